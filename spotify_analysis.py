@@ -0,0 +1,372 @@
+"""Reusable helpers for the Spotify Top 50 Tracks of 2020 analysis.
+
+The exploratory work lives in ``Spotify50.ipynb``; this module collects the
+data-loading and outlier-detection code so it can be imported from the
+notebook instead of being copy-pasted between cells.
+"""
+
+import functools
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit, prange
+except ImportError:  # pragma: no cover - numba is optional
+    njit = prange = None
+
+try:
+    import polars as pl
+except ImportError:  # pragma: no cover - polars is optional
+    pl = None
+
+if njit is not None:
+
+    @njit(parallel=True, cache=True)
+    def _iqr_mask(arr, lo, hi, out_mask, out_counts):
+        """Fill ``out_mask`` with the IQR bounds test, one column per thread.
+
+        Each column is read exactly once; the per-column outlier count is
+        accumulated in the same pass so callers can skip columns that
+        produced nothing. No ``fastmath`` here: the comparisons must keep
+        IEEE NaN semantics so NaNs classify as non-outliers, exactly like
+        the NumPy fallback.
+        """
+        for j in prange(arr.shape[1]):
+            count = 0
+            for i in range(arr.shape[0]):
+                hit = arr[i, j] < lo[j] or arr[i, j] > hi[j]
+                out_mask[i, j] = hit
+                count += hit
+            out_counts[j] = count
+
+    @njit(parallel=True, cache=True)
+    def _welford(arr):
+        """Compute per-column mean and sample std in a single pass."""
+        n, m = arr.shape
+        mu = np.empty(m)
+        sd = np.empty(m)
+        for j in prange(m):
+            mean = 0.0
+            m2 = 0.0
+            for i in range(n):
+                x = arr[i, j]
+                delta = x - mean
+                mean += delta / (i + 1)
+                m2 += delta * (x - mean)
+            mu[j] = mean
+            sd[j] = np.sqrt(m2 / (n - 1)) if n > 1 else 0.0
+        return mu, sd
+
+else:
+    _iqr_mask = _welford = None
+
+# Empty result Series keyed by dtype. The empties returned for outlier-free
+# columns are never mutated by callers, so one instance per dtype is enough.
+_EMPTY_SERIES_CACHE: Dict[np.dtype, pd.Series] = {}
+
+
+def _empty_series(dtype) -> pd.Series:
+    series = _EMPTY_SERIES_CACHE.get(dtype)
+    if series is None:
+        series = _EMPTY_SERIES_CACHE[dtype] = pd.Series(dtype=dtype)
+    return series
+
+
+@functools.lru_cache(maxsize=1)
+def find_project_root() -> Path:
+    """Return the repository root by walking up from the current directory.
+
+    The root is identified by the presence of ``requirements.txt``. Raises
+    ``FileNotFoundError`` if no ancestor directory contains the marker.
+
+    The result is cached for the lifetime of the process, so repeated
+    notebook calls skip the ancestor walk and its stat syscalls. Call
+    ``find_project_root.cache_clear()`` if the working directory changes.
+    """
+    directory = os.getcwd()
+    while True:
+        if os.path.isfile(os.path.join(directory, "requirements.txt")):
+            return Path(directory)
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            raise FileNotFoundError(
+                "Could not locate the project root (no requirements.txt found)."
+            )
+        directory = parent
+
+
+# Parsed DataFrames keyed by (path, mtime), so notebook cells that reload the
+# dataset skip the CSV parse as long as the file on disk is unchanged.
+_LOAD_CACHE: Dict[tuple, pd.DataFrame] = {}
+
+
+def load_spotify_data(file_path: Optional[Path] = None) -> pd.DataFrame:
+    """Load the Spotify Top 50 Tracks dataset into a DataFrame.
+
+    Defaults to ``spotifytoptracks.csv`` in the project root. The unnamed
+    index column exported by Spotify's CSV dump is dropped if present.
+
+    Results are cached by path and file mtime; a shallow copy is returned
+    so callers can add or drop columns without poisoning the cache. Call
+    ``load_spotify_data.cache_clear()`` to force a re-parse.
+
+    On the first CSV parse a Parquet sibling is written next to the file,
+    and later loads read it instead, skipping CSV tokenization entirely.
+    """
+    if file_path is None:
+        file_path = find_project_root() / "spotifytoptracks.csv"
+    mtime = file_path.stat().st_mtime
+    key = (str(file_path), mtime)
+    cached = _LOAD_CACHE.get(key)
+    if cached is not None:
+        return cached.copy(deep=False)
+    df = _read_dataset(file_path, mtime)
+    if "Unnamed: 0" in df.columns:
+        df = df.drop(columns=["Unnamed: 0"])
+    _LOAD_CACHE[key] = df
+    return df.copy(deep=False)
+
+
+def _read_dataset(file_path: Path, mtime: float) -> pd.DataFrame:
+    """Read the dataset, preferring a Parquet sibling over the CSV.
+
+    The Parquet copy is used only when it is at least as new as the CSV,
+    and is (re)written after a CSV parse so subsequent runs skip
+    tokenization. Both directions degrade gracefully when no Parquet
+    engine is installed.
+    """
+    parquet_path = file_path.with_suffix(".parquet")
+    if parquet_path != file_path:
+        try:
+            if parquet_path.stat().st_mtime >= mtime:
+                return pd.read_parquet(parquet_path, engine="pyarrow")
+        except Exception:
+            # A missing pyarrow, a truncated write, or any other bad cache
+            # state degrades to a CSV re-parse, which rewrites the sibling.
+            pass
+    try:
+        # The Arrow reader parses in parallel; keep the default NumPy dtypes
+        # though, since ArrowDtype columns come out of select_dtypes().
+        # to_numpy() as object arrays, which would defeat the vectorized
+        # outlier scans downstream.
+        df = pd.read_csv(file_path, engine="pyarrow")
+    except ImportError:
+        df = pd.read_csv(file_path, engine="c")
+    df = _downcast_numeric(df)
+    if parquet_path != file_path:
+        try:
+            df.to_parquet(parquet_path, compression="zstd")
+        except (OSError, ImportError, ValueError):
+            pass
+    return df
+
+
+load_spotify_data.cache_clear = _LOAD_CACHE.clear
+
+
+def _downcast_numeric(df: pd.DataFrame) -> pd.DataFrame:
+    """Downcast int64/float64 columns to the smallest dtype that fits.
+
+    The audio features are 0-1 floats and the counts are small integers, so
+    float32/int32 are plenty; halving the bytes per value halves the memory
+    bandwidth needed by every downstream vectorized scan.
+    """
+    for column in df.columns:
+        dtype = df[column].dtype
+        if dtype.kind == "f":
+            df[column] = pd.to_numeric(df[column], downcast="float")
+        elif dtype.kind == "i":
+            df[column] = pd.to_numeric(df[column], downcast="integer")
+    return df
+
+
+def _outlier_mask(numeric_df: pd.DataFrame, method: str, threshold: float):
+    """Compute the outlier mask for a numeric DataFrame.
+
+    Returns ``(arr, mask, counts)``: the underlying ndarray, a boolean mask
+    of the same shape, and the per-column outlier counts.
+    """
+    if numeric_df.shape[1] == 0:
+        # np.nanpercentile collapses a zero-width array to shape (0,) rather
+        # than (2, 0), so bail out before the quartile unpack.
+        arr = numeric_df.to_numpy(copy=False)
+        return arr, np.zeros(arr.shape, dtype=bool), np.zeros(0, dtype=np.int64)
+
+    counts = None
+
+    if method == "iqr":
+        arr = numeric_df.to_numpy(copy=False)
+        # One np.percentile call computes both quartiles off a shared
+        # partition, avoiding DataFrame.quantile's per-block overhead.
+        q1, q3 = np.nanpercentile(arr, [25, 75], axis=0)
+        iqr = q3 - q1
+        lo = q1 - threshold * iqr
+        hi = q3 + threshold * iqr
+        if arr.dtype.kind == "f":
+            # Keep the bounds in the block's own precision so the comparison
+            # does not silently upcast a float32 block to float64.
+            lo = lo.astype(arr.dtype, copy=False)
+            hi = hi.astype(arr.dtype, copy=False)
+        # Columns with zero-width IQR (constant or low-cardinality values)
+        # cannot produce meaningful outliers, so exclude them from the scan.
+        active = iqr > 0
+        if active.all():
+            # Only hand numeric-backed arrays to the jitted kernel; an
+            # object-dtype block (e.g. from extension arrays) cannot be typed
+            # by numba.
+            if _iqr_mask is not None and arr.dtype.kind in "fiu":
+                mask = np.empty(arr.shape, dtype=np.bool_)
+                counts = np.empty(arr.shape[1], dtype=np.int64)
+                _iqr_mask(np.ascontiguousarray(arr), lo, hi, mask, counts)
+            else:
+                # One broadcasted comparison over the whole numeric block
+                # instead of two comparison Series per column.
+                mask = (arr < lo) | (arr > hi)
+        else:
+            mask = np.zeros(arr.shape, dtype=bool)
+            sub = arr[:, active]
+            mask[:, active] = (sub < lo[active]) | (sub > hi[active])
+    elif method == "zscore":
+        arr = numeric_df.to_numpy(copy=False, dtype=np.float64)
+        if _welford is not None:
+            mu, sd = _welford(np.ascontiguousarray(arr))
+        else:
+            mu = np.mean(arr, axis=0)
+            sd = np.sqrt(np.var(arr, axis=0, ddof=1))
+        # Compare |x - mu| against threshold * sd instead of dividing, so no
+        # intermediate z-score DataFrame is ever materialized.
+        mask = np.abs(arr - mu) > threshold * sd
+    else:
+        raise ValueError(f"Unknown outlier detection method: {method!r}")
+
+    if counts is None:
+        counts = mask.sum(axis=0)
+    return arr, mask, counts
+
+
+def detect_outliers(
+    df: pd.DataFrame, method: str = "iqr", threshold: float = 1.5
+) -> Dict[str, pd.Series]:
+    """Detect outliers in every numeric column of ``df``.
+
+    With ``method="iqr"`` a value is an outlier when it falls outside
+    ``[Q1 - threshold * IQR, Q3 + threshold * IQR]``; with
+    ``method="zscore"`` when its z-score exceeds ``threshold`` in absolute
+    value. With the IQR method, columns whose IQR is zero (constant or
+    near-constant values) are never flagged, since the quartile bounds
+    are meaningless there. Returns a mapping from column name to the
+    Series of outlying values; non-numeric columns map to an empty
+    Series. Callers that only need the raw values should prefer
+    :func:`detect_outliers_arrays`.
+    """
+    numeric_df = df.select_dtypes(include=[np.number])
+    arr, mask, counts = _outlier_mask(numeric_df, method, threshold)
+
+    # One pass over df.columns builds the result directly in column order;
+    # the position map replaces both the membership test and the trailing
+    # fill-in pass over non-numeric columns.
+    idx = numeric_df.index
+    col_pos = {column: j for j, column in enumerate(numeric_df.columns)}
+
+    outliers: Dict[str, pd.Series] = {}
+    for column in df.columns:
+        j = col_pos.get(column)
+        if j is None or not counts[j]:
+            outliers[column] = _empty_series(df[column].dtype)
+        else:
+            sel = np.flatnonzero(mask[:, j])
+            outliers[column] = pd.Series(
+                arr[sel, j], index=idx[sel], name=column, copy=False
+            )
+    return outliers
+
+
+def detect_outliers_arrays(
+    df: pd.DataFrame, method: str = "iqr", threshold: float = 1.5
+) -> Dict[str, np.ndarray]:
+    """Like :func:`detect_outliers`, but return raw ndarrays of the values.
+
+    Covers only the numeric columns and skips pandas Series construction
+    entirely, which is noticeably cheaper when many columns have outliers
+    and the caller does not need the original row index. As with
+    :func:`detect_outliers`, zero-IQR columns are never flagged by the
+    IQR method.
+    """
+    numeric_df = df.select_dtypes(include=[np.number])
+    arr, mask, counts = _outlier_mask(numeric_df, method, threshold)
+    empty = np.empty(0, dtype=arr.dtype)
+    return {
+        column: arr[np.flatnonzero(mask[:, j]), j] if counts[j] else empty
+        for j, column in enumerate(numeric_df.columns)
+    }
+
+
+def detect_outliers_polars(
+    df: pd.DataFrame, threshold: float = 1.5
+) -> Dict[str, pd.Series]:
+    """IQR outlier detection with the quantile scans delegated to polars.
+
+    Drop-in alternative to ``detect_outliers(df, method="iqr")`` for wide
+    frames: the per-column quantile and bounds comparisons are evaluated by
+    polars in parallel across columns, and results are converted back to
+    pandas only at the boundary. Requires the optional ``polars`` package.
+    """
+    if pl is None:
+        raise ImportError("detect_outliers_polars requires the polars package")
+    numeric_df = df.select_dtypes(include=[np.number])
+    pdf = pl.from_pandas(numeric_df)
+
+    exprs = []
+    for column in pdf.columns:
+        col = pl.col(column)
+        q1 = col.quantile(0.25, interpolation="linear")
+        q3 = col.quantile(0.75, interpolation="linear")
+        iqr = q3 - q1
+        # Match _outlier_mask: zero-width-IQR columns produce no outliers.
+        exprs.append(
+            (
+                (iqr > 0) & ~col.is_between(q1 - threshold * iqr, q3 + threshold * iqr)
+            ).alias(column)
+        )
+    mask = pdf.select(exprs).to_numpy()
+
+    arr = numeric_df.to_numpy(copy=False)
+    idx = numeric_df.index
+    col_pos = {column: j for j, column in enumerate(numeric_df.columns)}
+
+    outliers: Dict[str, pd.Series] = {}
+    for column in df.columns:
+        j = col_pos.get(column)
+        if j is None or not mask[:, j].any():
+            outliers[column] = _empty_series(df[column].dtype)
+        else:
+            sel = np.flatnonzero(mask[:, j])
+            outliers[column] = pd.Series(
+                arr[sel, j], index=idx[sel], name=column, copy=False
+            )
+    return outliers
+
+
+def _format_outlier_block(item) -> str:
+    column, values = item
+    if values.empty:
+        return f"\nNo outliers in {column}"
+    return f"\nOutliers in {column}:\n{values.to_string()}"
+
+
+def print_outliers(outliers: Dict[str, pd.Series]) -> None:
+    """Print the outliers found by :func:`detect_outliers`, column by column.
+
+    Series formatting is farmed out to a small thread pool — ``to_string``
+    spends most of its time in NumPy calls that release the GIL — and the
+    blocks are written to stdout in the original column order.
+    """
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        blocks = list(executor.map(_format_outlier_block, outliers.items()))
+    sys.stdout.write("\n".join(blocks) + "\n")